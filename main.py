@@ -1,19 +1,47 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from fastapi.responses import ORJSONResponse, PlainTextResponse
+from pydantic import BaseModel, Field
+from contextlib import asynccontextmanager, AsyncExitStack
+from typing import List, Optional, Dict, Any, Union
 import oracledb
+import asyncio
 import os
+import time
 from datetime import datetime
+from collections import deque
 from dotenv import load_dotenv
+from cachetools import TTLCache
 
 # Carregar variáveis de ambiente do arquivo .env (para desenvolvimento local)
 load_dotenv()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global status_queue, stats_lock, pool_lock
+    # Startup/shutdown do pool Oracle
+    init_oracle_pool()
+    pool_lock = asyncio.Lock()
+    # Fila e lock criados aqui para ficarem associados ao event loop do servidor
+    status_queue = asyncio.Queue(maxsize=STATUS_QUEUE_MAX_SIZE)
+    stats_lock = asyncio.Lock()
+    flusher_task = asyncio.create_task(flush_status_updates())
+    if pessoa_ids is not None:
+        await pessoa_ids.refill()
+    yield
+    # Sinaliza o fim e espera o flusher gravar o que ainda estiver na fila antes de fechar o pool
+    await status_queue.put(None)
+    await flusher_task
+    if pool:
+        await close_oracle_pool()
+        print("Pool de conexões Oracle fechado.")
+
 app = FastAPI(
     title="Recomeçar API com Oracle",
     description="API para ajudar pessoas em situação de enchente, conectada ao Oracle.",
-    version="1.1.0"
+    version="1.1.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse # orjson serializa mais rápido e trata datetime nativamente (FastAPI < 0.131, ver requirements.txt)
 )
 
 app.add_middleware(
@@ -30,6 +58,9 @@ DB_PASSWORD = os.getenv("DB_PASSWORD")
 DB_HOST = os.getenv("DB_HOST")
 DB_PORT = os.getenv("DB_PORT", "1521")
 DB_SERVICE_NAME = os.getenv("DB_SERVICE_NAME")
+# Opcional: sequence que alimenta ID_PESSOA. Quando definida, os IDs são reservados em blocos e o cadastro
+# de pessoas dispensa o RETURNING (o data_cadastro passa a ser preenchido pela API)
+PESSOA_ID_SEQUENCE = os.getenv("PESSOA_ID_SEQUENCE")
 
 # Validação inicial das variáveis de ambiente do banco
 missing_vars = [var for var in [DB_USER, DB_PASSWORD, DB_HOST, DB_SERVICE_NAME] if var is None]
@@ -43,8 +74,17 @@ if missing_vars:
 # Exemplo: "oracle.fiap.com.br:1521/orcl.fiap.com.br"
 DB_DSN = f"{DB_HOST}:{DB_PORT}/{DB_SERVICE_NAME}" if DB_HOST and DB_SERVICE_NAME else None
 
+# CLOBs (ex.: JSON das listagens) chegam como str, sem precisar de leituras extras do LOB
+oracledb.defaults.fetch_lobs = False
+
+# Códigos ORA que indicam conexão perdida (not logged on, banco em shutdown, fim de comunicação, listener
+# indisponível...): ao recebê-los, o pool é fechado e recriado
+DEAD_POOL_ORA_CODES = frozenset({24324, 1033, 1089, 3113, 3114, 12537, 12541})
+
 # Pool de Conexões (Recomendado para produção)
+# Pool assíncrono (modo Thin): as chamadas ao banco não bloqueiam o event loop do Uvicorn
 pool = None
+pool_lock = None # asyncio.Lock criado no lifespan; serializa a recriação do pool
 
 def init_oracle_pool():
     global pool
@@ -54,27 +94,41 @@ def init_oracle_pool():
 
     try:
         print(f"Tentando inicializar pool Oracle com DSN: {DB_DSN}")
-        pool = oracledb.SessionPool(user=DB_USER, password=DB_PASSWORD, dsn=DB_DSN,
-                                     min=2, max=5, increment=1, encoding="UTF-8")
+        # create_pool_async retorna o AsyncConnectionPool diretamente; as conexões são abertas sob demanda
+        # Crescimento de 5 em 5 para absorver picos sem abrir conexões uma a uma; quando o pool está cheio,
+        # o acquire espera até 2s por uma conexão livre e então falha (503) em vez de travar a requisição
+        pool = oracledb.create_pool_async(user=DB_USER, password=DB_PASSWORD, dsn=DB_DSN,
+                                          min=5, max=50, increment=5,
+                                          getmode=oracledb.POOL_GETMODE_TIMEDWAIT, wait_timeout=2000,
+                                          stmtcachesize=50) # Reaproveita statements já parseados por conexão
         print("Pool de conexões Oracle inicializado com sucesso.")
     except oracledb.Error as e:
         print(f"Erro ao inicializar pool Oracle: {e}")
         pool = None # Garante que o pool não seja usado se a inicialização falhar
 
-@app.on_event("startup")
-async def startup_event():
-    init_oracle_pool()
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    global pool
-    if pool:
-        pool.close()
-        print("Pool de conexões Oracle fechado.")
-
-# Função para obter conexão do pool
-def get_db_connection():
+async def close_oracle_pool(force: bool = False):
     global pool
+    # Tira o pool de uso antes do await, para que nenhuma requisição adquira conexões dele durante o fechamento
+    old_pool, pool = pool, None
+    if old_pool:
+        try:
+            await old_pool.close(force=force)
+        except Exception as close_err:
+            print(f"Erro ao fechar pool existente: {close_err}")
+
+async def recycle_oracle_pool(failed_pool):
+    # Várias requisições podem perder a conexão ao mesmo tempo: só a primeira recria o pool; as demais
+    # encontram o pool global já trocado e não fecham o pool novo (que está saudável)
+    async with pool_lock:
+        if pool is not failed_pool:
+            return
+        print("Erro de conexão detectado. Tentando fechar e reabrir o pool.")
+        await close_oracle_pool(force=True) # Conexões ainda em uso por outras requisições estão mortas de qualquer forma
+        init_oracle_pool() # Tenta reestabelecer
+
+# Função para obter conexão do pool (context manager assíncrono: libera a conexão ao sair)
+@asynccontextmanager
+async def get_db_connection():
     if not pool:
         # Tenta reinicializar se o pool não estiver disponível (pode ter falhado no startup)
         print("Pool não inicializado. Tentando inicializar agora...")
@@ -82,75 +136,206 @@ def get_db_connection():
         if not pool: # Se ainda assim falhar
              raise HTTPException(status_code=503, detail="Serviço de banco de dados indisponível (pool não inicializado). Verifique as configurações e logs do servidor.")
 
+    # Guarda a referência: o pool global pode ser recriado enquanto a conexão está em uso
+    current_pool = pool
     try:
         # Adquire uma conexão do pool
         # O parâmetro 'timeout' pode ser útil aqui em cenários de alta carga
-        conn = pool.acquire()
-        return conn
+        conn = await current_pool.acquire()
     except oracledb.Error as e:
         print(f"Erro ao adquirir conexão do pool: {e}")
         raise HTTPException(status_code=503, detail=f"Erro ao conectar ao banco de dados: {e}")
 
+    try:
+        yield current_pool, conn # O pool de origem permite recriá-lo só se ainda for o atual
+    finally:
+        try:
+            await current_pool.release(conn) # Libera a conexão de volta para o pool
+        except oracledb.Error as e:
+            print(f"Erro ao liberar conexão: {e}")
+
+
+# Conexão por requisição HTTP: adquirida do pool no primeiro execute_query e reaproveitada pelos seguintes,
+# liberada ao final da requisição. Requisições atendidas pelo cache não chegam a adquirir conexão.
+# As escritas da requisição formam uma única transação: get_db faz um commit só depois que o handler retorna
+# (ou rollback se ele lançar exceção).
+class DbSession:
+    def __init__(self):
+        self.conn = None
+        self.pool = None # Pool de onde a conexão veio
+        self.pending_commit = False
+        self.cache_changes = []
+        self.stack = AsyncExitStack()
+
+    async def connection(self):
+        if self.conn is None:
+            self.pool, self.conn = await self.stack.enter_async_context(get_db_connection())
+        return self.conn
+
+    async def commit(self):
+        if self.conn is not None and self.pending_commit:
+            try:
+                await self.conn.commit()
+            except oracledb.Error as e:
+                print(f"Erro ao confirmar transação: {e}")
+                raise HTTPException(status_code=500, detail=f"Erro ao confirmar transação no banco: {e}")
+            self.pending_commit = False
+
+    async def rollback(self):
+        self.cache_changes.clear() # Nada foi gravado: o cache continua como estava
+        if self.conn is not None and self.pending_commit:
+            try:
+                await self.conn.rollback()
+            except oracledb.Error as e:
+                print(f"Erro ao desfazer transação: {e}")
+            self.pending_commit = False
+
+    def cache_after_commit(self, key: tuple, value: Optional[Dict[str, Any]] = None):
+        # Alteração do cache aplicada só depois do commit (value None remove a chave), para que outras
+        # requisições nunca leiam do cache uma escrita ainda não confirmada
+        self.cache_changes.append((key, value))
+
+    def apply_cache_changes(self):
+        for key, value in self.cache_changes:
+            if value is None:
+                cache.pop(key, None)
+            else:
+                cache[key] = value
+        self.cache_changes.clear()
+
+    async def close(self):
+        self.conn = None
+        await self.stack.aclose()
+
+# Usar com Depends(get_db, scope="function"): o código após o yield roda antes do envio da resposta,
+# então uma falha no commit ainda vira erro 500 para o cliente
+async def get_db():
+    db = DbSession()
+    try:
+        yield db
+        await db.commit()
+        db.apply_cache_changes()
+    except Exception:
+        await db.rollback()
+        raise
+    finally:
+        await db.close()
+
+async def commit_write(conn, db: Optional[DbSession]):
+    # Dentro de uma requisição o commit fica para o fim dela (get_db); fora (ex.: flusher em background) é imediato
+    if db is not None:
+        db.pending_commit = True
+    else:
+        await conn.commit()
+
+
+# Nomes das colunas (em minúsculas) por texto de SELECT: o cursor.description só é processado uma vez por query
+column_names_cache: Dict[str, tuple] = {}
 
 # Helper para executar queries e retornar resultados como dicts
-def execute_query(query: str, params: Optional[Dict[str, Any]] = None, fetch_one: bool = False, commit: bool = False, is_ddl: bool = False):
-    conn = None
-    cursor = None
+# params: dict para binds nomeados ou tupla para binds posicionais (no modo many, uma lista deles)
+async def execute_query(query: str, params: Union[Dict[str, Any], tuple, List[Dict[str, Any]], List[tuple], None] = None, fetch_one: bool = False, commit: bool = False, is_ddl: bool = False, return_rowcount: bool = False, many: bool = False, db: Optional[DbSession] = None, out_binds: Optional[Dict[str, Any]] = None, allow_partial: bool = False):
+    conn_pool = None
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Para DML/DDL que retorna ID (usando RETURNING INTO)
-        if "RETURNING" in query.upper() and params:
-            # Criar variáveis de bind para os out_params
-            out_params = {key: cursor.var(oracledb.NUMBER) for key in params if key.startswith("out_")}
-            bind_params = {**params, **out_params}
-            cursor.execute(query, bind_params)
-            returned_ids = {key: var.getvalue()[0] for key, var in out_params.items()} # getvalue() retorna lista
-            if commit:
-                conn.commit()
-            return returned_ids
-        
-        cursor.execute(query, params or {})
-
-        if is_ddl or commit: # DDL é auto-commit em algumas configs, mas explícito é melhor. Commit para DML.
-            conn.commit()
-            return None # DDL ou commit DML não retorna linhas
-
-        if fetch_one:
-            row = cursor.fetchone()
-            if row:
-                columns = [col[0].lower() for col in cursor.description]
-                return dict(zip(columns, row))
-            return None
-        else:
-            rows = cursor.fetchall()
-            columns = [col[0].lower() for col in cursor.description]
-            return [dict(zip(columns, row)) for row in rows]
-            
+        async with AsyncExitStack() as stack:
+            # Usa a conexão da requisição quando houver; senão adquire uma só para esta query
+            if db is not None:
+                conn = await db.connection()
+                conn_pool = db.pool
+            else:
+                conn_pool, conn = await stack.enter_async_context(get_db_connection())
+            cursor = conn.cursor()
+            try:
+                # Lote (executemany): params é uma lista de dicts, uma linha cada, enviada em uma única chamada de array DML
+                if many:
+                    rows = params or []
+                    if not rows:
+                        return []
+                    # out_binds (nome -> tipo) define as variáveis de RETURNING, uma posição por linha;
+                    # as linhas vão para o driver como vieram, sem cópias por linha
+                    out_params = {key: cursor.var(db_type, arraysize=len(rows)) for key, db_type in (out_binds or {}).items()}
+                    if out_params:
+                        cursor.setinputsizes(**out_params)
+                    await cursor.executemany(query, rows, batcherrors=True)
+                    # batcherrors reúne as falhas de todas as linhas; o lote é tudo ou nada, exceto com allow_partial,
+                    # em que as linhas válidas são confirmadas e as falhas (offset, mensagem) são devolvidas
+                    batch_errors = cursor.getbatcherrors()
+                    if allow_partial:
+                        if commit:
+                            await commit_write(conn, db)
+                        return batch_errors
+                    if batch_errors:
+                        await conn.rollback()
+                        if db is not None:
+                            db.pending_commit = False
+                        errors = "; ".join(f"linha {error.offset}: {error.message}" for error in batch_errors)
+                        raise HTTPException(status_code=400, detail=f"Erro no lote, nenhum registro foi gravado. {errors}")
+                    if commit:
+                        await commit_write(conn, db)
+                    if return_rowcount:
+                        return cursor.rowcount
+                    # getvalue(i) retorna a lista de valores devolvidos pela linha i
+                    return [{key: (var.getvalue(i) or [None])[0] for key, var in out_params.items()} for i in range(len(rows))]
+
+                # Para DML que devolve valores (RETURNING ... INTO): identificado pelos binds out_*, não pelo texto do SQL
+                out_keys = [key for key in params if key.startswith("out_")] if isinstance(params, dict) else []
+                if out_keys:
+                    # Criar variáveis de bind para os out_params (o placeholder informa o tipo; padrão NUMBER)
+                    out_params = {key: cursor.var(params[key] or oracledb.DB_TYPE_NUMBER) for key in out_keys}
+                    bind_params = {**params, **out_params}
+                    await cursor.execute(query, bind_params)
+                    # getvalue() retorna lista (vazia quando nenhuma linha foi afetada, ex.: UPDATE sem match)
+                    returned_data = {key: (var.getvalue() or [None])[0] for key, var in out_params.items()}
+                    if commit:
+                        await commit_write(conn, db)
+                    return returned_data
+
+                # prefetchrows/arraysize precisam ser definidos antes do execute para valer na primeira ida ao banco
+                if fetch_one:
+                    cursor.prefetchrows = 2
+                    cursor.arraysize = 1
+                else:
+                    # Listagens: busca até 1000 linhas por round-trip (padrão do driver é 100)
+                    cursor.prefetchrows = 1001
+                    cursor.arraysize = 1000
+
+                await cursor.execute(query, params or {})
+
+                if is_ddl or commit:
+                    if is_ddl: # DDL é auto-commit em algumas configs, mas explícito é melhor.
+                        await conn.commit()
+                    else: # Commit para DML (adiado para o fim da requisição quando há DbSession)
+                        await commit_write(conn, db)
+                    if return_rowcount:
+                        return cursor.rowcount # Linhas afetadas pelo DML (0 = registro inexistente)
+                    return None # DDL ou commit DML não retorna linhas
+
+                columns = column_names_cache.get(query)
+                if columns is None:
+                    columns = tuple(col[0].lower() for col in cursor.description)
+                    column_names_cache[query] = columns
+                # O driver monta o dict de cada linha durante o fetch, sem uma segunda passada sobre as linhas
+                cursor.rowfactory = lambda *row, _columns=columns: dict(zip(_columns, row))
+
+                if fetch_one:
+                    return await cursor.fetchone()
+                else:
+                    return await cursor.fetchall()
+            finally:
+                cursor.close()
+
+    except HTTPException:
+        raise # Erros de disponibilidade do pool (503) seguem como estão
     except oracledb.DatabaseError as e:
         error_obj, = e.args
         print(f"Oracle Database Error: {error_obj.code} - {error_obj.message}")
         # Se for erro de "not logged on", pode ser que o pool perdeu a conexão
-        if error_obj.code == 24324 or error_obj.code == 1033 or error_obj.code == 1089 or error_obj.code == 3113 or error_obj.code == 3114 or error_obj.code == 12537 or error_obj.code == 12541:
-             print("Erro de conexão detectado. Tentando fechar e reabrir o pool.")
-             global pool
-             if pool:
-                 try:
-                     pool.close()
-                 except Exception as close_err:
-                     print(f"Erro ao fechar pool existente: {close_err}")
-                 pool = None
-             init_oracle_pool() # Tenta reestabelecer
+        if error_obj.code in DEAD_POOL_ORA_CODES and conn_pool is not None:
+             await recycle_oracle_pool(conn_pool)
         raise HTTPException(status_code=500, detail=f"Erro no banco de dados Oracle: {error_obj.message}")
     except Exception as e:
         print(f"Erro genérico na execução da query: {e}")
         raise HTTPException(status_code=500, detail=f"Erro interno do servidor: {e}")
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            pool.release(conn) # Libera a conexão de volta para o pool
 
 # --- Models Pydantic (semelhantes aos anteriores, mas ID pode ser opcional na criação) ---
 class PessoaBase(BaseModel):
@@ -228,199 +413,551 @@ class Doacao(DoacaoBase):
     id_doacao: int
     data_doacao: datetime
 
+# Limite de tamanho do status aceito pelo endpoint com buffer; validar antes de enfileirar evita que a gravação
+# falhe depois do 202. O padrão de 50 é uma suposição (o schema da tabela DOACOES não está neste repositório):
+# ajuste DOACAO_STATUS_MAX_LENGTH ao tamanho real da coluna DOACOES.STATUS
+STATUS_MAX_LENGTH = int(os.getenv("DOACAO_STATUS_MAX_LENGTH", "50"))
+
+class DoacaoStatusUpdate(BaseModel):
+    status: str = Field(min_length=1, max_length=STATUS_MAX_LENGTH)
+
+# Colunas de cada tabela (nome -> tipo da variável de bind) devolvidas pelo UPDATE ... RETURNING
+PESSOA_COLUMNS = {
+    "id_pessoa": oracledb.DB_TYPE_NUMBER,
+    "nome": oracledb.DB_TYPE_VARCHAR,
+    "cpf": oracledb.DB_TYPE_VARCHAR,
+    "telefone": oracledb.DB_TYPE_VARCHAR,
+    "endereco": oracledb.DB_TYPE_VARCHAR,
+    "situacao": oracledb.DB_TYPE_VARCHAR,
+    "necessidades": oracledb.DB_TYPE_VARCHAR,
+    "data_cadastro": oracledb.DB_TYPE_TIMESTAMP,
+}
+
+ABRIGO_COLUMNS = {
+    "id_abrigo": oracledb.DB_TYPE_NUMBER,
+    "nome": oracledb.DB_TYPE_VARCHAR,
+    "endereco": oracledb.DB_TYPE_VARCHAR,
+    "capacidade": oracledb.DB_TYPE_NUMBER,
+    "ocupacao_atual": oracledb.DB_TYPE_NUMBER,
+    "responsavel": oracledb.DB_TYPE_VARCHAR,
+    "telefone_responsavel": oracledb.DB_TYPE_VARCHAR,
+    "recursos_disponiveis": oracledb.DB_TYPE_VARCHAR,
+    "data_criacao": oracledb.DB_TYPE_TIMESTAMP,
+}
+
+DOACAO_COLUMNS = {
+    "id_doacao": oracledb.DB_TYPE_NUMBER,
+    "doador_nome": oracledb.DB_TYPE_VARCHAR,
+    "doador_telefone": oracledb.DB_TYPE_VARCHAR,
+    "tipo_doacao": oracledb.DB_TYPE_VARCHAR,
+    "descricao": oracledb.DB_TYPE_VARCHAR,
+    "quantidade": oracledb.DB_TYPE_VARCHAR,
+    "status": oracledb.DB_TYPE_VARCHAR,
+    "data_doacao": oracledb.DB_TYPE_TIMESTAMP,
+    "id_abrigo_destino": oracledb.DB_TYPE_NUMBER,
+}
+
+def returning_clause(columns: Dict[str, Any]) -> str:
+    # Ex.: "RETURNING ID_PESSOA, NOME INTO :out_id_pessoa, :out_nome"
+    return f"RETURNING {', '.join(col.upper() for col in columns)} INTO {', '.join(f':out_{col}' for col in columns)}"
+
+def returning_params(columns: Dict[str, Any]) -> Dict[str, Any]:
+    # Placeholders out_* com o tipo de cada variável de bind
+    return {f"out_{col}": db_type for col, db_type in columns.items()}
+
+def returned_row(returned_data: Dict[str, Any]) -> Dict[str, Any]:
+    # Remove o prefixo out_ para obter a linha no formato dos models
+    return {key[len("out_"):]: value for key, value in returned_data.items()}
+
+# Variáveis OUT (nome -> tipo) de cada statement com RETURNING, montadas uma única vez no import
+PESSOA_INSERT_OUT_BINDS = {"out_id_pessoa": oracledb.DB_TYPE_NUMBER, "out_data_cadastro": oracledb.DB_TYPE_TIMESTAMP}
+ABRIGO_INSERT_OUT_BINDS = {"out_id_abrigo": oracledb.DB_TYPE_NUMBER, "out_data_criacao": oracledb.DB_TYPE_TIMESTAMP}
+DOACAO_INSERT_OUT_BINDS = {"out_id_doacao": oracledb.DB_TYPE_NUMBER, "out_data_doacao": oracledb.DB_TYPE_TIMESTAMP}
+PESSOA_UPDATE_OUT_BINDS = returning_params(PESSOA_COLUMNS)
+ABRIGO_UPDATE_OUT_BINDS = returning_params(ABRIGO_COLUMNS)
+DOACAO_UPDATE_OUT_BINDS = returning_params(DOACAO_COLUMNS)
+
+
+# SQL dos UPDATEs por (tabela, campos enviados): no máximo 2^k textos por tabela, sempre idênticos,
+# o que mantém o statement cache do pool acertando
+update_query_cache: Dict[tuple, str] = {}
+
+def update_query(table: str, id_column: str, update_data: Dict[str, Any], columns: Dict[str, Any]) -> str:
+    key = (table, tuple(sorted(update_data)))
+    query = update_query_cache.get(key)
+    if query is None:
+        set_clauses = ", ".join(f"{field.upper()} = :{field}" for field in key[1])
+        query = f"UPDATE {table} SET {set_clauses} WHERE {id_column} = :{id_column.lower()}_param {returning_clause(columns)}"
+        update_query_cache[key] = query
+    return query
+
+def json_array_payload(result: Optional[Dict[str, Any]]) -> str:
+    # JSON_ARRAYAGG devolve NULL quando a tabela está vazia
+    return (result or {}).get("payload") or "[]"
+
+
+# Cache em memória das leituras por ID, chave (entidade, id). Após o commit, PUT grava a linha nova no cache e DELETE a remove.
+# Os handlers rodam todos no event loop (uma única thread), então o TTLCache dispensa lock; um GET concorrente
+# com um PUT pode, no pior caso, manter a versão antiga no cache até o TTL expirar.
+CACHE_TTL_SECONDS = 30
+cache = TTLCache(maxsize=10_000, ttl=CACHE_TTL_SECONDS)
+
+# Statements SQL fixos: o texto é sempre idêntico, então o statement cache do pool acerta em toda execução.
+# Binds posicionais (:1, :2) nos statements de parâmetro único ou executados em lote; binds nomeados ficam
+# para os INSERT/UPDATE que recebem o dict do model.
+INSERT_PESSOA_QUERY = """
+        INSERT INTO PESSOAS (NOME, CPF, TELEFONE, ENDERECO, SITUACAO, NECESSIDADES)
+        VALUES (:nome, :cpf, :telefone, :endereco, :situacao, :necessidades)
+        RETURNING ID_PESSOA, DATA_CADASTRO INTO :out_id_pessoa, :out_data_cadastro
+    """
+
+INSERT_ABRIGO_QUERY = """
+        INSERT INTO ABRIGOS (NOME, ENDERECO, CAPACIDADE, OCUPACAO_ATUAL, RESPONSAVEL, TELEFONE_RESPONSAVEL, RECURSOS_DISPONIVEIS)
+        VALUES (:nome, :endereco, :capacidade, :ocupacao_atual, :responsavel, :telefone_responsavel, :recursos_disponiveis)
+        RETURNING ID_ABRIGO, DATA_CRIACAO INTO :out_id_abrigo, :out_data_criacao
+    """
+
+INSERT_DOACAO_QUERY = """
+        INSERT INTO DOACOES (DOADOR_NOME, DOADOR_TELEFONE, TIPO_DOACAO, DESCRICAO, QUANTIDADE, STATUS, ID_ABRIGO_DESTINO)
+        VALUES (:doador_nome, :doador_telefone, :tipo_doacao, :descricao, :quantidade, :status, :id_abrigo_destino)
+        RETURNING ID_DOACAO, DATA_DOACAO INTO :out_id_doacao, :out_data_doacao
+    """
+
+INSERT_PESSOA_WITH_ID_QUERY = """
+        INSERT INTO PESSOAS (ID_PESSOA, NOME, CPF, TELEFONE, ENDERECO, SITUACAO, NECESSIDADES, DATA_CADASTRO)
+        VALUES (:id_pessoa, :nome, :cpf, :telefone, :endereco, :situacao, :necessidades, :data_cadastro)
+    """
+
+SELECT_PESSOA_QUERY = "SELECT ID_PESSOA, NOME, CPF, TELEFONE, ENDERECO, SITUACAO, NECESSIDADES, DATA_CADASTRO FROM PESSOAS WHERE ID_PESSOA = :1"
+
+LIST_PESSOAS_QUERY = """
+        SELECT JSON_ARRAYAGG(JSON_OBJECT(
+            'id_pessoa' VALUE ID_PESSOA,
+            'nome' VALUE NOME,
+            'cpf' VALUE CPF,
+            'telefone' VALUE TELEFONE,
+            'endereco' VALUE ENDERECO,
+            'situacao' VALUE SITUACAO,
+            'necessidades' VALUE NECESSIDADES,
+            'data_cadastro' VALUE DATA_CADASTRO
+            RETURNING CLOB
+        ) ORDER BY NOME RETURNING CLOB) AS payload
+        FROM PESSOAS
+    """
+
+DELETE_PESSOA_QUERY = "DELETE FROM PESSOAS WHERE ID_PESSOA = :1"
+
+SELECT_ABRIGO_QUERY = "SELECT ID_ABRIGO, NOME, ENDERECO, CAPACIDADE, OCUPACAO_ATUAL, RESPONSAVEL, TELEFONE_RESPONSAVEL, RECURSOS_DISPONIVEIS, DATA_CRIACAO FROM ABRIGOS WHERE ID_ABRIGO = :1"
+
+LIST_ABRIGOS_QUERY = """
+        SELECT JSON_ARRAYAGG(JSON_OBJECT(
+            'id_abrigo' VALUE ID_ABRIGO,
+            'nome' VALUE NOME,
+            'endereco' VALUE ENDERECO,
+            'capacidade' VALUE CAPACIDADE,
+            'ocupacao_atual' VALUE OCUPACAO_ATUAL,
+            'responsavel' VALUE RESPONSAVEL,
+            'telefone_responsavel' VALUE TELEFONE_RESPONSAVEL,
+            'recursos_disponiveis' VALUE RECURSOS_DISPONIVEIS,
+            'data_criacao' VALUE DATA_CRIACAO
+            RETURNING CLOB
+        ) ORDER BY NOME RETURNING CLOB) AS payload
+        FROM ABRIGOS
+    """
+
+DELETE_ABRIGO_QUERY = "DELETE FROM ABRIGOS WHERE ID_ABRIGO = :1"
+
+SELECT_DOACAO_QUERY = "SELECT ID_DOACAO, DOADOR_NOME, DOADOR_TELEFONE, TIPO_DOACAO, DESCRICAO, QUANTIDADE, STATUS, DATA_DOACAO, ID_ABRIGO_DESTINO FROM DOACOES WHERE ID_DOACAO = :1"
+
+LIST_DOACOES_QUERY = """
+        SELECT JSON_ARRAYAGG(JSON_OBJECT(
+            'id_doacao' VALUE ID_DOACAO,
+            'doador_nome' VALUE DOADOR_NOME,
+            'doador_telefone' VALUE DOADOR_TELEFONE,
+            'tipo_doacao' VALUE TIPO_DOACAO,
+            'descricao' VALUE DESCRICAO,
+            'quantidade' VALUE QUANTIDADE,
+            'status' VALUE STATUS,
+            'data_doacao' VALUE DATA_DOACAO,
+            'id_abrigo_destino' VALUE ID_ABRIGO_DESTINO
+            RETURNING CLOB
+        ) ORDER BY DATA_DOACAO DESC RETURNING CLOB) AS payload
+        FROM DOACOES
+    """
+
+DELETE_DOACAO_QUERY = "DELETE FROM DOACOES WHERE ID_DOACAO = :1"
+
+UPDATE_DOACAO_STATUS_QUERY = "UPDATE DOACOES SET STATUS = :1 WHERE ID_DOACAO = :2"
+
+# Estatísticas em uma única ida ao banco: cada tabela é lida uma vez, com agregação condicional
+STATS_QUERY = """
+        SELECT p.total_pessoas, p.pessoas_desabrigadas,
+               a.total_abrigos, a.vagas_disponiveis,
+               d.total_doacoes, d.doacoes_pendentes
+        FROM (SELECT COUNT(*) AS total_pessoas,
+                     COUNT(CASE WHEN SITUACAO = 'desabrigado' THEN 1 END) AS pessoas_desabrigadas
+              FROM PESSOAS) p,
+             (SELECT COUNT(*) AS total_abrigos,
+                     NVL(SUM(CAPACIDADE - OCUPACAO_ATUAL), 0) AS vagas_disponiveis
+              FROM ABRIGOS) a,
+             (SELECT COUNT(*) AS total_doacoes,
+                     COUNT(CASE WHEN STATUS = 'pendente' THEN 1 END) AS doacoes_pendentes
+              FROM DOACOES) d
+    """
+
+# IDs reservados de uma sequence em blocos (NEXTVAL ... CONNECT BY LEVEL), consumidos sem ida ao banco.
+# Quando o estoque fica abaixo do mínimo, um novo bloco é buscado em background. Lacunas na numeração
+# (IDs reservados e não usados) são normais em sequences.
+class SequenceIds:
+    def __init__(self, sequence: str, block_size: int = 100, low_watermark: int = 25):
+        self.query = f"SELECT {sequence}.NEXTVAL AS id FROM DUAL CONNECT BY LEVEL <= :1"
+        self.block_size = block_size
+        self.low_watermark = low_watermark
+        self.ids = deque()
+        self.refill_task = None
+
+    async def reserve(self, quantity: int) -> List[int]:
+        try:
+            rows = await execute_query(self.query, (quantity,))
+        except HTTPException as e:
+            print(f"Erro ao reservar IDs da sequence: {e.detail}")
+            raise HTTPException(status_code=503, detail="Não foi possível reservar IDs no banco de dados")
+        return [row["id"] for row in rows]
+
+    async def refill(self):
+        try:
+            self.ids.extend(await self.reserve(self.block_size))
+        except HTTPException:
+            pass # Já registrado em reserve; o próximo take tenta de novo
+
+    async def take(self, count: int = 1) -> List[int]:
+        # Consome o estoque sem await entre a checagem e o popleft; o que faltar vem direto de uma reserva nova,
+        # para que outra corrotina não leve os IDs recém-reservados enquanto esta espera o banco
+        ids = [self.ids.popleft() for _ in range(min(count, len(self.ids)))]
+        missing = count - len(ids)
+        if missing:
+            reserved = await self.reserve(max(self.block_size, missing))
+            ids.extend(reserved[:missing])
+            self.ids.extend(reserved[missing:])
+        if len(self.ids) < self.low_watermark and (self.refill_task is None or self.refill_task.done()):
+            self.refill_task = asyncio.create_task(self.refill())
+        return ids
+
+pessoa_ids = SequenceIds(PESSOA_ID_SEQUENCE) if PESSOA_ID_SEQUENCE else None
 
 # --- Rotas API com Oracle ---
 
 # Pessoas
 @app.post("/pessoas", response_model=Pessoa, status_code=201)
-async def cadastrar_pessoa(pessoa: PessoaCreate):
-    query = """
-        INSERT INTO PESSOAS (NOME, CPF, TELEFONE, ENDERECO, SITUACAO, NECESSIDADES)
-        VALUES (:nome, :cpf, :telefone, :endereco, :situacao, :necessidades)
-        RETURNING ID_PESSOA INTO :out_id_pessoa
-    """
-    params = pessoa.dict()
-    params["out_id_pessoa"] = None # Placeholder para o valor retornado
-    
+async def cadastrar_pessoa(pessoa: PessoaCreate, db: DbSession = Depends(get_db, scope="function")):
     try:
-        returned_data = execute_query(query, params, commit=True)
-        new_id = returned_data['out_id_pessoa']
-        # Buscar o registro recém-criado para retornar todos os campos, incluindo data_cadastro default
-        return await obter_pessoa(new_id)
+        if pessoa_ids is not None:
+            # ID reservado da sequence: a linha completa é montada aqui e o INSERT não precisa de RETURNING
+            nova_pessoa = Pessoa(**pessoa.model_dump(), id_pessoa=(await pessoa_ids.take())[0], data_cadastro=datetime.now())
+            await execute_query(INSERT_PESSOA_WITH_ID_QUERY, nova_pessoa.model_dump(), commit=True, db=db)
+            return nova_pessoa
+        # Placeholders para os valores retornados (tipo da variável de bind)
+        params = {**pessoa.model_dump(), **PESSOA_INSERT_OUT_BINDS}
+        returned_data = await execute_query(INSERT_PESSOA_QUERY, params, commit=True, db=db)
+        # O RETURNING já traz o ID e o data_cadastro default: não é preciso buscar o registro de novo
+        return Pessoa(**pessoa.model_dump(), id_pessoa=returned_data['out_id_pessoa'], data_cadastro=returned_data['out_data_cadastro'])
     except HTTPException as e:
         if "UNIQUE_CONSTRAINT_VIOLATED" in str(e.detail).upper() or "ORA-00001" in str(e.detail): # ORA-00001 é unique constraint
             raise HTTPException(status_code=409, detail=f"CPF {pessoa.cpf} já cadastrado.")
         raise e
 
+@app.post("/pessoas/batch", response_model=List[Pessoa], status_code=201)
+async def cadastrar_pessoas_lote(pessoas: List[PessoaCreate], db: DbSession = Depends(get_db, scope="function")):
+    if not pessoas:
+        raise HTTPException(status_code=400, detail="Nenhuma pessoa informada")
+    # Um único executemany e um único commit para o lote inteiro
+    try:
+        if pessoa_ids is not None:
+            data_cadastro = datetime.now()
+            novas_pessoas = [Pessoa(**pessoa.model_dump(), id_pessoa=id_pessoa, data_cadastro=data_cadastro)
+                             for pessoa, id_pessoa in zip(pessoas, await pessoa_ids.take(len(pessoas)))]
+            await execute_query(INSERT_PESSOA_WITH_ID_QUERY, [nova_pessoa.model_dump() for nova_pessoa in novas_pessoas], commit=True, many=True, db=db)
+            return novas_pessoas
+        rows = [pessoa.model_dump() for pessoa in pessoas]
+        returned_rows = await execute_query(INSERT_PESSOA_QUERY, rows, commit=True, many=True, db=db, out_binds=PESSOA_INSERT_OUT_BINDS)
+    except HTTPException as e:
+        if "ORA-00001" in str(e.detail): # ORA-00001 é unique constraint
+            raise HTTPException(status_code=409, detail=f"CPF já cadastrado no lote. {e.detail}")
+        raise e
+    return [Pessoa(**pessoa.model_dump(), id_pessoa=returned_data['out_id_pessoa'], data_cadastro=returned_data['out_data_cadastro'])
+            for pessoa, returned_data in zip(pessoas, returned_rows)]
+
 
 @app.get("/pessoas", response_model=List[Pessoa])
-async def listar_pessoas():
-    query = "SELECT ID_PESSOA, NOME, CPF, TELEFONE, ENDERECO, SITUACAO, NECESSIDADES, DATA_CADASTRO FROM PESSOAS ORDER BY NOME"
-    result = execute_query(query)
-    return result
+async def listar_pessoas(db: DbSession = Depends(get_db, scope="function")):
+    # O Oracle monta o array JSON da resposta; o response_model fica só para a documentação do schema
+    result = await execute_query(LIST_PESSOAS_QUERY, fetch_one=True, db=db)
+    return Response(content=json_array_payload(result), media_type="application/json")
 
 @app.get("/pessoas/{pessoa_id}", response_model=Pessoa)
-async def obter_pessoa(pessoa_id: int):
-    query = "SELECT ID_PESSOA, NOME, CPF, TELEFONE, ENDERECO, SITUACAO, NECESSIDADES, DATA_CADASTRO FROM PESSOAS WHERE ID_PESSOA = :id_pessoa"
-    pessoa = execute_query(query, {"id_pessoa": pessoa_id}, fetch_one=True)
-    if not pessoa:
-        raise HTTPException(status_code=404, detail="Pessoa não encontrada")
+async def obter_pessoa(pessoa_id: int, db: DbSession = Depends(get_db, scope="function")):
+    key = ("pessoa", pessoa_id)
+    pessoa = cache.get(key)
+    if pessoa is None:
+        pessoa = await execute_query(SELECT_PESSOA_QUERY, (pessoa_id,), fetch_one=True, db=db)
+        if not pessoa:
+            raise HTTPException(status_code=404, detail="Pessoa não encontrada")
+        cache[key] = pessoa
     return pessoa
 
 @app.put("/pessoas/{pessoa_id}", response_model=Pessoa)
-async def atualizar_pessoa(pessoa_id: int, pessoa_update: PessoaUpdate):
-    # Primeiro, verifica se a pessoa existe
-    await obter_pessoa(pessoa_id) # Isso lançará 404 se não existir
-
-    update_data = pessoa_update.dict(exclude_unset=True)
+async def atualizar_pessoa(pessoa_id: int, pessoa_update: PessoaUpdate, db: DbSession = Depends(get_db, scope="function")):
+    update_data = pessoa_update.model_dump(exclude_unset=True)
     if not update_data:
         raise HTTPException(status_code=400, detail="Nenhum dado fornecido para atualização")
 
-    set_clauses = ", ".join([f"{key.upper()} = :{key}" for key in update_data.keys()])
-    query = f"UPDATE PESSOAS SET {set_clauses} WHERE ID_PESSOA = :id_pessoa_param"
+    # O RETURNING devolve a linha atualizada; se nenhuma linha casar, a pessoa não existe
+    query = update_query("PESSOAS", "ID_PESSOA", update_data, PESSOA_COLUMNS)
     
-    params = {**update_data, "id_pessoa_param": pessoa_id}
+    params = {**update_data, "id_pessoa_param": pessoa_id, **PESSOA_UPDATE_OUT_BINDS}
     
-    execute_query(query, params, commit=True)
-    return await obter_pessoa(pessoa_id)
+    returned_data = await execute_query(query, params, commit=True, db=db)
+    if returned_data['out_id_pessoa'] is None:
+        raise HTTPException(status_code=404, detail="Pessoa não encontrada")
+    pessoa_data = returned_row(returned_data)
+    db.cache_after_commit(("pessoa", pessoa_id), pessoa_data)
+    return pessoa_data
 
 @app.delete("/pessoas/{pessoa_id}", status_code=204)
-async def deletar_pessoa(pessoa_id: int):
-    # Primeiro, verifica se a pessoa existe
-    await obter_pessoa(pessoa_id) # Isso lançará 404 se não existir
-    query = "DELETE FROM PESSOAS WHERE ID_PESSOA = :id_pessoa"
-    execute_query(query, {"id_pessoa": pessoa_id}, commit=True)
+async def deletar_pessoa(pessoa_id: int, db: DbSession = Depends(get_db, scope="function")):
+    deleted = await execute_query(DELETE_PESSOA_QUERY, (pessoa_id,), commit=True, return_rowcount=True, db=db)
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Pessoa não encontrada")
+    db.cache_after_commit(("pessoa", pessoa_id))
     return None # HTTP 204 No Content
 
 # --- Rotas para Abrigos (implementar de forma similar) ---
 @app.post("/abrigos", response_model=Abrigo, status_code=201)
-async def cadastrar_abrigo(abrigo: AbrigoCreate):
-    query = """
-        INSERT INTO ABRIGOS (NOME, ENDERECO, CAPACIDADE, OCUPACAO_ATUAL, RESPONSAVEL, TELEFONE_RESPONSAVEL, RECURSOS_DISPONIVEIS)
-        VALUES (:nome, :endereco, :capacidade, :ocupacao_atual, :responsavel, :telefone_responsavel, :recursos_disponiveis)
-        RETURNING ID_ABRIGO INTO :out_id_abrigo
-    """
-    params = abrigo.dict()
-    params["out_id_abrigo"] = None
+async def cadastrar_abrigo(abrigo: AbrigoCreate, db: DbSession = Depends(get_db, scope="function")):
+    params = {**abrigo.model_dump(), **ABRIGO_INSERT_OUT_BINDS}
     try:
-        returned_data = execute_query(query, params, commit=True)
-        new_id = returned_data['out_id_abrigo']
-        return await obter_abrigo(new_id)
+        returned_data = await execute_query(INSERT_ABRIGO_QUERY, params, commit=True, db=db)
+        return Abrigo(**abrigo.model_dump(), id_abrigo=returned_data['out_id_abrigo'], data_criacao=returned_data['out_data_criacao'])
     except HTTPException as e:
         raise e
 
+@app.post("/abrigos/batch", response_model=List[Abrigo], status_code=201)
+async def cadastrar_abrigos_lote(abrigos: List[AbrigoCreate], db: DbSession = Depends(get_db, scope="function")):
+    if not abrigos:
+        raise HTTPException(status_code=400, detail="Nenhum abrigo informado")
+    rows = [abrigo.model_dump() for abrigo in abrigos]
+    returned_rows = await execute_query(INSERT_ABRIGO_QUERY, rows, commit=True, many=True, db=db, out_binds=ABRIGO_INSERT_OUT_BINDS)
+    return [Abrigo(**abrigo.model_dump(), id_abrigo=returned_data['out_id_abrigo'], data_criacao=returned_data['out_data_criacao'])
+            for abrigo, returned_data in zip(abrigos, returned_rows)]
+
 @app.get("/abrigos", response_model=List[Abrigo])
-async def listar_abrigos():
-    query = "SELECT ID_ABRIGO, NOME, ENDERECO, CAPACIDADE, OCUPACAO_ATUAL, RESPONSAVEL, TELEFONE_RESPONSAVEL, RECURSOS_DISPONIVEIS, DATA_CRIACAO FROM ABRIGOS ORDER BY NOME"
-    return execute_query(query)
+async def listar_abrigos(db: DbSession = Depends(get_db, scope="function")):
+    result = await execute_query(LIST_ABRIGOS_QUERY, fetch_one=True, db=db)
+    return Response(content=json_array_payload(result), media_type="application/json")
 
 @app.get("/abrigos/{abrigo_id}", response_model=Abrigo)
-async def obter_abrigo(abrigo_id: int):
-    query = "SELECT ID_ABRIGO, NOME, ENDERECO, CAPACIDADE, OCUPACAO_ATUAL, RESPONSAVEL, TELEFONE_RESPONSAVEL, RECURSOS_DISPONIVEIS, DATA_CRIACAO FROM ABRIGOS WHERE ID_ABRIGO = :id_abrigo"
-    abrigo_data = execute_query(query, {"id_abrigo": abrigo_id}, fetch_one=True)
-    if not abrigo_data:
-        raise HTTPException(status_code=404, detail="Abrigo não encontrado")
+async def obter_abrigo(abrigo_id: int, db: DbSession = Depends(get_db, scope="function")):
+    key = ("abrigo", abrigo_id)
+    abrigo_data = cache.get(key)
+    if abrigo_data is None:
+        abrigo_data = await execute_query(SELECT_ABRIGO_QUERY, (abrigo_id,), fetch_one=True, db=db)
+        if not abrigo_data:
+            raise HTTPException(status_code=404, detail="Abrigo não encontrado")
+        cache[key] = abrigo_data
     return abrigo_data
 
 @app.put("/abrigos/{abrigo_id}", response_model=Abrigo)
-async def atualizar_abrigo(abrigo_id: int, abrigo_update: AbrigoUpdate):
-    await obter_abrigo(abrigo_id) # Valida existência
-    update_data = abrigo_update.dict(exclude_unset=True)
+async def atualizar_abrigo(abrigo_id: int, abrigo_update: AbrigoUpdate, db: DbSession = Depends(get_db, scope="function")):
+    update_data = abrigo_update.model_dump(exclude_unset=True)
     if not update_data:
         raise HTTPException(status_code=400, detail="Nenhum dado para atualização")
-    set_clauses = ", ".join([f"{key.upper()} = :{key}" for key in update_data.keys()])
-    query = f"UPDATE ABRIGOS SET {set_clauses} WHERE ID_ABRIGO = :id_abrigo_param"
-    params = {**update_data, "id_abrigo_param": abrigo_id}
-    execute_query(query, params, commit=True)
-    return await obter_abrigo(abrigo_id)
+    query = update_query("ABRIGOS", "ID_ABRIGO", update_data, ABRIGO_COLUMNS)
+    params = {**update_data, "id_abrigo_param": abrigo_id, **ABRIGO_UPDATE_OUT_BINDS}
+    returned_data = await execute_query(query, params, commit=True, db=db)
+    if returned_data['out_id_abrigo'] is None:
+        raise HTTPException(status_code=404, detail="Abrigo não encontrado")
+    abrigo_data = returned_row(returned_data)
+    db.cache_after_commit(("abrigo", abrigo_id), abrigo_data)
+    return abrigo_data
 
 @app.delete("/abrigos/{abrigo_id}", status_code=204)
-async def deletar_abrigo(abrigo_id: int):
-    await obter_abrigo(abrigo_id) # Valida existência
+async def deletar_abrigo(abrigo_id: int, db: DbSession = Depends(get_db, scope="function")):
     # Adicionar lógica para verificar se o abrigo tem dependências (pessoas, doações) antes de excluir, se necessário
-    query = "DELETE FROM ABRIGOS WHERE ID_ABRIGO = :id_abrigo"
-    execute_query(query, {"id_abrigo": abrigo_id}, commit=True)
+    deleted = await execute_query(DELETE_ABRIGO_QUERY, (abrigo_id,), commit=True, return_rowcount=True, db=db)
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Abrigo não encontrado")
+    db.cache_after_commit(("abrigo", abrigo_id))
     return None
 
 # --- Rotas para Doações (implementar de forma similar) ---
 @app.post("/doacoes", response_model=Doacao, status_code=201)
-async def cadastrar_doacao(doacao: DoacaoCreate):
-    query = """
-        INSERT INTO DOACOES (DOADOR_NOME, DOADOR_TELEFONE, TIPO_DOACAO, DESCRICAO, QUANTIDADE, STATUS, ID_ABRIGO_DESTINO)
-        VALUES (:doador_nome, :doador_telefone, :tipo_doacao, :descricao, :quantidade, :status, :id_abrigo_destino)
-        RETURNING ID_DOACAO INTO :out_id_doacao
-    """
-    params = doacao.dict()
-    params["out_id_doacao"] = None
+async def cadastrar_doacao(doacao: DoacaoCreate, db: DbSession = Depends(get_db, scope="function")):
+    params = {**doacao.model_dump(), **DOACAO_INSERT_OUT_BINDS}
     try:
-        returned_data = execute_query(query, params, commit=True)
-        new_id = returned_data['out_id_doacao']
-        return await obter_doacao(new_id)
+        returned_data = await execute_query(INSERT_DOACAO_QUERY, params, commit=True, db=db)
+        return Doacao(**doacao.model_dump(), id_doacao=returned_data['out_id_doacao'], data_doacao=returned_data['out_data_doacao'])
     except HTTPException as e:
         raise e
 
+@app.post("/doacoes/batch", response_model=List[Doacao], status_code=201)
+async def cadastrar_doacoes_lote(doacoes: List[DoacaoCreate], db: DbSession = Depends(get_db, scope="function")):
+    if not doacoes:
+        raise HTTPException(status_code=400, detail="Nenhuma doação informada")
+    rows = [doacao.model_dump() for doacao in doacoes]
+    returned_rows = await execute_query(INSERT_DOACAO_QUERY, rows, commit=True, many=True, db=db, out_binds=DOACAO_INSERT_OUT_BINDS)
+    return [Doacao(**doacao.model_dump(), id_doacao=returned_data['out_id_doacao'], data_doacao=returned_data['out_data_doacao'])
+            for doacao, returned_data in zip(doacoes, returned_rows)]
+
 @app.get("/doacoes", response_model=List[Doacao])
-async def listar_doacoes():
-    query = "SELECT ID_DOACAO, DOADOR_NOME, DOADOR_TELEFONE, TIPO_DOACAO, DESCRICAO, QUANTIDADE, STATUS, DATA_DOACAO, ID_ABRIGO_DESTINO FROM DOACOES ORDER BY DATA_DOACAO DESC"
-    return execute_query(query)
+async def listar_doacoes(db: DbSession = Depends(get_db, scope="function")):
+    result = await execute_query(LIST_DOACOES_QUERY, fetch_one=True, db=db)
+    return Response(content=json_array_payload(result), media_type="application/json")
 
 @app.get("/doacoes/{doacao_id}", response_model=Doacao)
-async def obter_doacao(doacao_id: int):
-    query = "SELECT ID_DOACAO, DOADOR_NOME, DOADOR_TELEFONE, TIPO_DOACAO, DESCRICAO, QUANTIDADE, STATUS, DATA_DOACAO, ID_ABRIGO_DESTINO FROM DOACOES WHERE ID_DOACAO = :id_doacao"
-    doacao_data = execute_query(query, {"id_doacao": doacao_id}, fetch_one=True)
-    if not doacao_data:
-        raise HTTPException(status_code=404, detail="Doação não encontrada")
+async def obter_doacao(doacao_id: int, db: DbSession = Depends(get_db, scope="function")):
+    key = ("doacao", doacao_id)
+    doacao_data = cache.get(key)
+    if doacao_data is None:
+        doacao_data = await execute_query(SELECT_DOACAO_QUERY, (doacao_id,), fetch_one=True, db=db)
+        if not doacao_data:
+            raise HTTPException(status_code=404, detail="Doação não encontrada")
+        cache[key] = doacao_data
     return doacao_data
 
 @app.put("/doacoes/{doacao_id}", response_model=Doacao)
-async def atualizar_doacao(doacao_id: int, doacao_update: DoacaoUpdate):
-    await obter_doacao(doacao_id) # Valida existência
-    update_data = doacao_update.dict(exclude_unset=True)
+async def atualizar_doacao(doacao_id: int, doacao_update: DoacaoUpdate, db: DbSession = Depends(get_db, scope="function")):
+    update_data = doacao_update.model_dump(exclude_unset=True)
     if not update_data:
         raise HTTPException(status_code=400, detail="Nenhum dado para atualização")
-    set_clauses = ", ".join([f"{key.upper()} = :{key}" for key in update_data.keys()])
-    query = f"UPDATE DOACOES SET {set_clauses} WHERE ID_DOACAO = :id_doacao_param"
-    params = {**update_data, "id_doacao_param": doacao_id}
-    execute_query(query, params, commit=True)
-    return await obter_doacao(doacao_id)
+    query = update_query("DOACOES", "ID_DOACAO", update_data, DOACAO_COLUMNS)
+    params = {**update_data, "id_doacao_param": doacao_id, **DOACAO_UPDATE_OUT_BINDS}
+    returned_data = await execute_query(query, params, commit=True, db=db)
+    if returned_data['out_id_doacao'] is None:
+        raise HTTPException(status_code=404, detail="Doação não encontrada")
+    doacao_data = returned_row(returned_data)
+    db.cache_after_commit(("doacao", doacao_id), doacao_data)
+    return doacao_data
 
 @app.delete("/doacoes/{doacao_id}", status_code=204)
-async def deletar_doacao(doacao_id: int):
-    await obter_doacao(doacao_id) # Valida existência
-    query = "DELETE FROM DOACOES WHERE ID_DOACAO = :id_doacao"
-    execute_query(query, {"id_doacao": doacao_id}, commit=True)
+async def deletar_doacao(doacao_id: int, db: DbSession = Depends(get_db, scope="function")):
+    deleted = await execute_query(DELETE_DOACAO_QUERY, (doacao_id,), commit=True, return_rowcount=True, db=db)
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Doação não encontrada")
+    db.cache_after_commit(("doacao", doacao_id))
     return None
 
+# --- Atualização de status de doações com buffer de escrita ---
+# As atualizações entram numa fila e são gravadas em lote (um executemany + um commit) por uma task em background.
+# A resposta é 202: o novo status fica visível no banco em até STATUS_FLUSH_INTERVAL_SECONDS.
+# Linhas rejeitadas pelo banco não derrubam o lote: as demais são gravadas e só as falhas são registradas no log.
+# Falhas de conexão/pool são tentadas de novo STATUS_FLUSH_ATTEMPTS vezes antes de o lote ser descartado.
+STATUS_FLUSH_MAX_ROWS = 500
+STATUS_FLUSH_INTERVAL_SECONDS = 0.05
+STATUS_FLUSH_ATTEMPTS = 3
+STATUS_FLUSH_RETRY_SECONDS = 0.5
+# Limite da fila em memória: com o banco fora do ar o flusher não drena a fila, então novas atualizações
+# recebem 503 em vez de 202 quando ela enche
+STATUS_QUEUE_MAX_SIZE = 10_000
+
+status_queue = None # asyncio.Queue criada no lifespan
+
+async def write_status_batch(batch: Dict[int, str]):
+    rows = [(status, doacao_id) for doacao_id, status in batch.items()]
+    for attempt in range(1, STATUS_FLUSH_ATTEMPTS + 1):
+        try:
+            batch_errors = await execute_query(UPDATE_DOACAO_STATUS_QUERY, rows, commit=True, many=True, allow_partial=True)
+            break
+        except HTTPException as e:
+            print(f"Erro ao gravar lote de status de doações ({len(rows)} itens, tentativa {attempt}/{STATUS_FLUSH_ATTEMPTS}): {e.detail}")
+            if attempt == STATUS_FLUSH_ATTEMPTS:
+                print(f"Lote de status descartado; doações afetadas: {', '.join(str(doacao_id) for doacao_id in batch)}")
+                return
+            await asyncio.sleep(STATUS_FLUSH_RETRY_SECONDS * attempt)
+    for error in batch_errors:
+        status, doacao_id = rows[error.offset]
+        print(f"Status '{status}' da doação {doacao_id} não gravado: {error.message}")
+    for doacao_id in batch:
+        cache.pop(("doacao", doacao_id), None)
+
+async def flush_status_updates():
+    loop = asyncio.get_running_loop()
+    stopping = False
+    while not stopping:
+        item = await status_queue.get()
+        if item is None: # Sinal de shutdown
+            break
+        # Um dict por lote: várias atualizações do mesmo ID viram uma só (vale a última)
+        batch = {item[0]: item[1]}
+        deadline = loop.time() + STATUS_FLUSH_INTERVAL_SECONDS
+        while len(batch) < STATUS_FLUSH_MAX_ROWS:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(status_queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if item is None:
+                stopping = True
+                break
+            batch[item[0]] = item[1]
+        await write_status_batch(batch)
+
+@app.post("/doacoes/{doacao_id}/status", status_code=202,
+          description="Enfileira a atualização de status e responde 202 sem esperar o banco. A gravação é feita em lote "
+                      "em até alguns milissegundos. Se o banco ficar indisponível durante todas as novas tentativas, "
+                      "ou se rejeitar a linha (ex.: violação de constraint), a atualização é perdida e apenas registrada no log do servidor. "
+                      "Doações inexistentes são ignoradas. Responde 503 quando a fila de atualizações pendentes está cheia.")
+async def atualizar_status_doacao(doacao_id: int, status_update: DoacaoStatusUpdate):
+    # Caminho rápido: não valida a existência da doação; IDs inexistentes simplesmente não atualizam nenhuma linha
+    try:
+        status_queue.put_nowait((doacao_id, status_update.status))
+    except asyncio.QueueFull:
+        raise HTTPException(status_code=503, detail="Fila de atualizações de status cheia. Tente novamente em instantes.")
+    return {"id_doacao": doacao_id, "status": status_update.status, "detail": "Atualização de status enfileirada"}
+
 # Rota de Estatísticas (adaptar para Oracle)
-@app.get("/estatisticas")
-async def obter_estatisticas():
-    query_pessoas_total = "SELECT COUNT(*) AS total FROM PESSOAS"
-    query_pessoas_desabrigadas = "SELECT COUNT(*) AS total FROM PESSOAS WHERE SITUACAO = 'desabrigado'"
-    query_abrigos_total = "SELECT COUNT(*) AS total FROM ABRIGOS"
-    query_vagas_disponiveis = "SELECT SUM(CAPACIDADE - OCUPACAO_ATUAL) AS total FROM ABRIGOS"
-    query_doacoes_total = "SELECT COUNT(*) AS total FROM DOACOES"
-    query_doacoes_pendentes = "SELECT COUNT(*) AS total FROM DOACOES WHERE STATUS = 'pendente'"
+# Resultado memorizado por STATS_TTL_SECONDS e cacheável por navegadores/CDNs pelo mesmo tempo. O lock faz
+# com que, ao expirar, só uma requisição vá ao banco enquanto as demais esperam pelo valor novo.
+STATS_TTL_SECONDS = 5
+stats_cache = None
+stats_cached_at = 0.0
+stats_lock = None # asyncio.Lock criado no lifespan
 
+@app.get("/estatisticas")
+async def obter_estatisticas(db: DbSession = Depends(get_db, scope="function")):
+    global stats_cache, stats_cached_at
+    async with stats_lock:
+        if stats_cache is None or time.monotonic() - stats_cached_at >= STATS_TTL_SECONDS:
+            stats_cache = await buscar_estatisticas(db)
+            stats_cached_at = time.monotonic()
+    return ORJSONResponse(content=stats_cache, headers={"Cache-Control": f"public, max-age={STATS_TTL_SECONDS}"})
+
+async def buscar_estatisticas(db: DbSession) -> Dict[str, Any]:
     try:
-        total_pessoas = execute_query(query_pessoas_total, fetch_one=True)['total']
-        pessoas_desabrigadas = execute_query(query_pessoas_desabrigadas, fetch_one=True)['total']
-        total_abrigos = execute_query(query_abrigos_total, fetch_one=True)['total']
-        vagas_disponiveis_result = execute_query(query_vagas_disponiveis, fetch_one=True)
-        vagas_disponiveis = vagas_disponiveis_result['total'] if vagas_disponiveis_result and vagas_disponiveis_result['total'] is not None else 0
-        total_doacoes = execute_query(query_doacoes_total, fetch_one=True)['total']
-        doacoes_pendentes = execute_query(query_doacoes_pendentes, fetch_one=True)['total']
+        estatisticas = await execute_query(STATS_QUERY, fetch_one=True, db=db)
     except Exception as e:
         print(f"Erro ao buscar estatísticas: {e}")
         raise HTTPException(status_code=500, detail=f"Erro ao buscar estatísticas do banco: {e}")
 
     return {
-        "total_pessoas": total_pessoas,
-        "pessoas_desabrigadas": pessoas_desabrigadas,
-        "total_abrigos": total_abrigos,
-        "vagas_disponiveis": vagas_disponiveis,
-        "total_doacoes": total_doacoes,
-        "doacoes_pendentes": doacoes_pendentes
+        "total_pessoas": estatisticas['total_pessoas'],
+        "pessoas_desabrigadas": estatisticas['pessoas_desabrigadas'],
+        "total_abrigos": estatisticas['total_abrigos'],
+        "vagas_disponiveis": estatisticas['vagas_disponiveis'],
+        "total_doacoes": estatisticas['total_doacoes'],
+        "doacoes_pendentes": estatisticas['doacoes_pendentes']
+    }
+
+# Métricas do pool no formato texto do Prometheus
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metricas():
+    gauges = {
+        "oracle_pool_busy": pool.busy if pool else 0,
+        "oracle_pool_opened": pool.opened if pool else 0,
+        "oracle_pool_max": pool.max if pool else 0,
     }
+    return "".join(f"# TYPE {name} gauge\n{name} {value}\n" for name, value in gauges.items())
 
 if __name__ == "__main__":
     import uvicorn